@@ -1,88 +1,110 @@
+import hashlib
+import io
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from scoring import REQUIRED_COLS, RISK_LABELS, read_transactions, score_frame
+
 st.set_page_config(page_title="Transaction Risk Scoring", layout="wide")
 
 st.title("💳 Transaction Risk Scoring App")
 
+# Keep only the last few uploads' results in server memory
+CACHE_MAX_ENTRIES = 3
+
 # --- Upload CSV ---
 uploaded_file = st.file_uploader("Upload a CSV file of transactions", type=["csv"])
 
-# --- Risk scoring function ---
-def calculate_risk_score(row):
-    score = 10
-
-    # Amount-based scoring
-    if row["amount_usd"] > 10000:
-        score += 30
-    elif row["amount_usd"] > 5000:
-        score += 20
-    elif row["amount_usd"] > 1000:
-        score += 10
-
-    # Country corridor risk (example: sender != receiver)
-    if row["sender_country"] != row["receiver_country"]:
-        score += 10
-
-    # KYC tier
-    if row["kyc_tier"] == "low":
-        score += 20
-    elif row["kyc_tier"] == "medium":
-        score += 10
-
-    # Velocity
-    if row["velocity_1h"] > 5:
-        score += 20
-    if row["velocity_24h"] > 20:
-        score += 20
-
-    # Merchant category
-    if row["merchant_category"] in ["gambling", "crypto", "luxury_goods"]:
-        score += 15
-
-    # Device change
-    if row["device_change_flag"] == 1:
-        score += 15
-
-    # Account age
-    if row["customer_age_days"] < 30:
-        score += 15
-    elif row["customer_age_days"] < 90:
-        score += 10
-
-    # Sanctioned party
-    if row["sanctioned_party_flag"] == 1:
-        return 100
-
-    return min(score, 100)
-
-# --- Risk category function ---
-def categorize_risk(score):
-    if score >= 70:
-        return "High"
-    elif score >= 40:
-        return "Medium"
-    else:
-        return "Low"
+# --- Cached loading & scoring ---
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def load_and_score(file_bytes):
+    header = pd.read_csv(io.BytesIO(file_bytes), nrows=0).columns
+    missing = [col for col in REQUIRED_COLS if col not in header]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    # Compute risk score & category
+    return score_frame(read_transactions(io.BytesIO(file_bytes), header))
+
+# --- Columns shown in the top-20 table ---
+TOP_TABLE_COLS = [
+    "txn_id", "timestamp", "sender_country", "receiver_country", "amount_usd",
+    "channel", "merchant_category", "kyc_tier", "risk_score", "risk_category",
+]
+
+# --- Cached dashboard aggregates ---
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def summarize_risk(file_hash, _df):
+    # _df is not hashed by Streamlit; file_hash identifies the upload it came from
+    # One pass over the category column feeds both the KPIs and the charts
+    category_counts = _df["risk_category"].value_counts()
+
+    total_txns = len(_df)
+    high_risk = int(category_counts.get("High", 0))
+    medium_risk = int(category_counts.get("Medium", 0))
+    low_risk = int(category_counts.get("Low", 0))
+
+    # Partial selection over the High slice instead of sorting every row
+    high_mask = (_df["risk_category"] == "High").to_numpy()
+    top_cols = [col for col in TOP_TABLE_COLS if col in _df.columns]
+    top20 = _df.loc[high_mask, top_cols].nlargest(20, "risk_score")
+
+    counts = category_counts.reindex(RISK_LABELS, fill_value=0).reset_index()
+    counts.columns = ["risk_category", "count"]
+
+    return total_txns, high_risk, medium_risk, low_risk, top20, counts
+
+# --- Cached CSV export ---
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def to_csv_bytes(file_hash, _file_bytes, _df):
+    # Re-read the upload as plain text so every column keeps its original values,
+    # then append the two score columns
+    original = pd.read_csv(io.BytesIO(_file_bytes), dtype=str, keep_default_na=False)
+    original["risk_score"] = _df["risk_score"].to_numpy()
+    original["risk_category"] = _df["risk_category"].to_numpy()
+    return original.to_csv(index=False).encode("utf-8")
+
+# --- Cached chart figures ---
+# Figures are rebuilt only when the numbers behind them change
+@st.cache_resource(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def build_risk_pie(keys, values):
+    return px.pie(
+        pd.DataFrame({"risk_category": keys, "count": values}),
+        names="risk_category",
+        values="count",
+        hole=0.3,
+        color_discrete_sequence=["#2a9d8f", "#f4a261", "#e63946"]
+    )
+
+@st.cache_resource(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def build_risk_bar(keys, values):
+    return px.bar(
+        pd.DataFrame({"risk_category": keys, "count": values}),
+        x="risk_category",
+        y="count",
+        color="risk_category",
+        color_discrete_sequence=["#2a9d8f", "#f4a261", "#e63946"],
+        text="count"
+    )
 
 # --- Process uploaded file ---
 if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file)
+    file_bytes = uploaded_file.getvalue()
+    try:
+        df = load_and_score(file_bytes)
+    except ValueError as exc:
+        st.error(str(exc))
+        st.stop()
 
-    # Compute risk score & category
-    df["risk_score"] = df.apply(calculate_risk_score, axis=1)
-    df["risk_category"] = df["risk_score"].apply(categorize_risk)
+    file_hash = hashlib.sha256(file_bytes).hexdigest()
+    total_txns, high_risk, medium_risk, low_risk, top20, counts = summarize_risk(file_hash, df)
 
     st.subheader("📊 Risk Analysis Dashboard")
 
     # --- Metrics ---
-    total_txns = len(df)
-    high_risk = len(df[df["risk_category"] == "High"])
-    medium_risk = len(df[df["risk_category"] == "Medium"])
-    low_risk = len(df[df["risk_category"] == "Low"])
-
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Transactions", total_txns)
     col2.metric("High Risk", high_risk)
@@ -91,33 +113,30 @@ if uploaded_file is not None:
 
     # --- Top 20 High Risk ---
     st.subheader("🚨 Top 20 High-Risk Transactions")
-    top20 = df.sort_values("risk_score", ascending=False).head(20)
-    st.dataframe(top20)
+    st.dataframe(
+        top20,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "amount_usd": st.column_config.NumberColumn("amount_usd", format="$%.2f"),
+            "risk_score": st.column_config.ProgressColumn("risk_score", min_value=0, max_value=100, format="%d"),
+        }
+    )
+
+    # --- Download scored data ---
+    st.download_button(
+        "⬇️ Download Scored CSV",
+        data=to_csv_bytes(file_hash, file_bytes, df),
+        file_name="transactions_scored.csv",
+        mime="text/csv"
+    )
 
     # --- Distribution charts ---
     st.subheader("📈 Risk Category Distribution")
 
-    counts = df["risk_category"].value_counts().reset_index()
-    counts.columns = ["risk_category", "count"]
-
-    # Pie chart
-    fig1 = px.pie(
-        counts,
-        names="risk_category",
-        values="count",
-        hole=0.3,
-        color_discrete_sequence=["#2a9d8f", "#f4a261", "#e63946"]
-    )
-
-    # Bar chart
-    fig2 = px.bar(
-        counts,
-        x="risk_category",
-        y="count",
-        color="risk_category",
-        color_discrete_sequence=["#2a9d8f", "#f4a261", "#e63946"],
-        text="count"
-    )
+    risk_keys, risk_values = tuple(counts["risk_category"]), tuple(counts["count"])
+    fig1 = build_risk_pie(risk_keys, risk_values)
+    fig2 = build_risk_bar(risk_keys, risk_values)
 
     colA, colB = st.columns(2)
     colA.plotly_chart(fig1, use_container_width=True)
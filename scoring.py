@@ -0,0 +1,142 @@
+# Transaction risk scoring pipeline. Kept free of Streamlit so any UI can import it.
+
+import numpy as np
+import pandas as pd
+
+# --- Expected CSV schema ---
+DTYPES = {
+    "txn_id": "string[pyarrow]",
+    "sender_country": "string[pyarrow]",
+    "receiver_country": "string[pyarrow]",
+    "amount_usd": "float32",
+    "channel": "string[pyarrow]",
+    "customer_age_days": "float32",
+    "prior_txn_24h": "float32",
+    "sanctioned_party_flag": "string[pyarrow]",
+    "kyc_tier": "string[pyarrow]",
+    "merchant_category": "string[pyarrow]",
+    "velocity_1h": "float32",
+    "velocity_24h": "float32",
+    "device_change_flag": "string[pyarrow]",
+}
+PARSE_DATES = ["timestamp"]
+REQUIRED_COLS = [
+    "sender_country", "receiver_country", "amount_usd", "customer_age_days",
+    "sanctioned_party_flag", "kyc_tier", "merchant_category",
+    "velocity_1h", "velocity_24h", "device_change_flag",
+]
+
+def read_transactions(source, header):
+    # Only parse the columns we know about, with their dtypes fixed up front
+    columns = [col for col in header if col in DTYPES or col in PARSE_DATES]
+    options = dict(
+        usecols=columns,
+        dtype={col: DTYPES[col] for col in columns if col in DTYPES},
+        parse_dates=[col for col in PARSE_DATES if col in columns],
+    )
+    try:
+        return pd.read_csv(source, engine="pyarrow", **options)
+    except pd.errors.ParserError:
+        # PyArrow rejects ragged rows; the C parser pads them with NaN instead.
+        # Other errors (e.g. a non-numeric amount) are raised as-is.
+        source.seek(0)
+        return pd.read_csv(source, **options)
+
+# --- Risk scoring rules ---
+KYC_TIER_SCORES = {"low": 20, "medium": 10}
+RISKY_MERCHANT_CATS = ["gambling", "crypto", "luxury_goods"]
+
+# --- Column normalization ---
+CATEGORY_COLS = ["sender_country", "receiver_country", "kyc_tier", "merchant_category", "channel"]
+TRUTHY = ["1", "true", "yes", "y", "t"]
+
+def to_bool(values):
+    # Accepts 1/0, true/false, yes/no and numeric strings like "1.0"; blanks are False
+    text = values.astype("string").str.strip().str.lower()
+    numeric = pd.to_numeric(text, errors="coerce").fillna(0).to_numpy() != 0
+    return text.isin(TRUTHY).to_numpy(dtype=bool, na_value=False) | numeric
+
+def normalize_columns(df):
+    # Values are kept as uploaded; the scoring lookups normalize the categories instead
+    for col in CATEGORY_COLS:
+        if col in df:
+            df[col] = df[col].astype("category")
+
+    return df
+
+# --- Per-category lookups ---
+def lookup_by_code(values, table, default, dtype):
+    # One slot per (lower-cased) category plus a trailing default, which missing values (code -1) index
+    lookup = [table.get(str(cat).strip().lower(), default) for cat in values.cat.categories]
+    return np.array(lookup + [default], dtype=dtype)[values.cat.codes.to_numpy()]
+
+def country_codes(df):
+    # Map both columns' categories onto one upper-cased country list so that the
+    # resulting codes compare across columns; missing values stay -1
+    countries = {}
+    codes = []
+    for col in ["sender_country", "receiver_country"]:
+        categories = df[col].cat.categories
+        lookup = [countries.setdefault(str(cat).strip().upper(), len(countries)) for cat in categories]
+        codes.append(np.array(lookup + [-1], dtype=np.int32)[df[col].cat.codes.to_numpy()])
+    return codes
+
+def risky_merchant_mask(df):
+    return lookup_by_code(df["merchant_category"], dict.fromkeys(RISKY_MERCHANT_CATS, True), False, bool)
+
+# --- Risk scoring function ---
+def calculate_risk_scores(df):
+    amount = pd.to_numeric(df["amount_usd"], errors="coerce").to_numpy(dtype=np.float32)
+    velocity_1h = pd.to_numeric(df["velocity_1h"], errors="coerce").to_numpy(dtype=np.float32)
+    velocity_24h = pd.to_numeric(df["velocity_24h"], errors="coerce").to_numpy(dtype=np.float32)
+    age_days = pd.to_numeric(df["customer_age_days"], errors="coerce").to_numpy(dtype=np.float32)
+    sender, receiver = country_codes(df)
+    # A missing country counts as a different one, as NaN != NaN did row by row
+    cross_border = (sender != receiver) | (sender < 0)
+    kyc_bonus = lookup_by_code(df["kyc_tier"], KYC_TIER_SCORES, 0, np.int16)
+    risky_mcc = risky_merchant_mask(df)
+    device_change = to_bool(df["device_change_flag"])
+    sanctioned = to_bool(df["sanctioned_party_flag"])
+
+    # Accumulate in int16 (the raw sum can pass 127); the final 0-100 score fits in int8.
+    # Every rule adds into this one buffer in place; int16 bump values keep np.select
+    # at the same width, so no wider intermediate score arrays are created.
+    score = np.full(len(df), 10, dtype=np.int16)
+
+    # Amount-based scoring
+    score += np.select([amount > 10000, amount > 5000, amount > 1000], np.int16([30, 20, 10]), default=0)
+
+    # Country corridor risk (example: sender != receiver)
+    np.add(score, 10, out=score, where=cross_border)
+
+    # KYC tier
+    score += kyc_bonus
+
+    # Velocity
+    np.add(score, 20, out=score, where=velocity_1h > 5)
+    np.add(score, 20, out=score, where=velocity_24h > 20)
+
+    # Merchant category
+    np.add(score, 15, out=score, where=risky_mcc)
+
+    # Device change
+    np.add(score, 15, out=score, where=device_change)
+
+    # Account age
+    score += np.select([age_days < 30, age_days < 90], np.int16([15, 10]), default=0)
+
+    # Sanctioned party
+    np.clip(score, 0, 100, out=score)
+    score[sanctioned] = 100
+    return score.astype(np.int8)
+
+# --- Risk category bands: 0-39 Low, 40-69 Medium, 70-100 High ---
+RISK_BINS = [-1, 39, 69, 100]
+RISK_LABELS = ["Low", "Medium", "High"]
+
+# --- Full pipeline: normalize, score, categorize ---
+def score_frame(df):
+    df = normalize_columns(df)
+    df["risk_score"] = calculate_risk_scores(df)
+    df["risk_category"] = pd.cut(df["risk_score"], bins=RISK_BINS, labels=RISK_LABELS, ordered=True)
+    return df